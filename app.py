@@ -2,16 +2,30 @@
 CLC Timetable — Cowandilla Learning Centre
 ==========================================
 - PyMuPDF (fitz) for PDF rendering — no poppler needed
-- Per-program tabs: General, JP, PY, SY
+- Per-program selector: General, JP, PY, SY, SSO (only the selected one is loaded)
 - Auto term/week display in header
 - Admin: upload, delete old versions
+- PDFs live in the Supabase Storage bucket `timetables`; rows keep the path
+- `SUPABASE_KEY` in secrets must be the service_role key: the bucket is
+  private and has no storage.objects policies, so anon would be refused
 - Mobile-responsive layout
 """
 
 import streamlit as st
-import base64
+import pybase64
+import hashlib
+import hmac
 from datetime import datetime, timezone, date
-from io import BytesIO
+from functools import lru_cache
+from io import BufferedReader
+from uuid import uuid4
+
+# Imported up front so the first PDF view doesn't pay for loading MuPDF;
+# supabase stays lazy in get_client().
+try:
+    from pdf_render import render_pages
+except ImportError:
+    render_pages = None
 
 st.set_page_config(
     page_title="CLC Timetable",
@@ -29,11 +43,17 @@ SA_TERMS = [
     (4, date(2026, 10, 12), 9),
 ]
 
+# (term_number, first_monday, last_sunday)
+_TERM_SPANS = [
+    (term_num, first_mon, date.fromordinal(first_mon.toordinal() + total_weeks * 7 - 1))
+    for term_num, first_mon, total_weeks in SA_TERMS
+]
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_term_week_label() -> str:
     """Return e.g. 'Term 1 · Week 5' or 'School Holidays' based on today's date."""
     today = date.today()
-    for term_num, first_mon, total_weeks in SA_TERMS:
-        term_end = date.fromordinal(first_mon.toordinal() + total_weeks * 7 - 1)
+    for term_num, first_mon, term_end in _TERM_SPANS:
         if first_mon <= today <= term_end:
             week_num = (today - first_mon).days // 7 + 1
             return f"Term {term_num}  ·  Week {week_num}"
@@ -45,9 +65,12 @@ def get_term_week_label() -> str:
 # ── Supabase ──────────────────────────────────────────────────────────────────
 @st.cache_resource
 def get_client():
+    # Server-side only: SUPABASE_KEY is the service_role key (see module docstring)
     from supabase import create_client
     return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"])
 
+TIMETABLE_BUCKET = "timetables"
+
 PROGRAMS = ["General", "JP", "PY", "SY", "SSO"]
 PROGRAM_LABELS = {
     "General": "📋 All Staff",
@@ -57,64 +80,258 @@ PROGRAM_LABELS = {
     "SSO":     "🟠 SSO Support",
 }
 
-def get_timetable(program: str):
-    """Return the latest timetable row for a given program."""
+# Everything except the PDF itself; the body is fetched separately, on demand
+META_COLUMNS = "id, filename, label, uploaded_by, uploaded_at, program, storage_path"
+
+# Reads are cached so reruns don't each hit PostgREST; failures raise out of
+# the cached helpers so they are never cached. Writes clear the cache, and the
+# TTL bounds how long other server processes can show a superseded upload.
+QUERY_TTL = 60
+
+@st.cache_data(ttl=QUERY_TTL, show_spinner=False)
+def _fetch_latest_by_program() -> dict:
+    # `current_timetables` is a DISTINCT ON (program) view backed by (program, uploaded_at DESC)
+    result = get_client().table("current_timetables").select(META_COLUMNS).execute()
+    return {row["program"]: row for row in result.data or []}
+
+HISTORY_PAGE_SIZE = 20
+
+@st.cache_data(ttl=QUERY_TTL, show_spinner=False)
+def _fetch_history_page(program: str, page: int) -> list:
+    start = page * HISTORY_PAGE_SIZE
+    result = (
+        get_client()
+        .table("timetable_store")
+        .select(META_COLUMNS)
+        .eq("program", program)
+        .order("uploaded_at", desc=True)
+        .range(start, start + HISTORY_PAGE_SIZE)   # inclusive: one extra row flags a next page
+        .execute()
+    )
+    return result.data or []
+
+@st.cache_data(ttl=QUERY_TTL, show_spinner=False)
+def _fetch_legacy_rows() -> list:
+    # Rows uploaded before the Storage move still carry base64 `file_data`
+    result = (
+        get_client()
+        .table("timetable_store")
+        .select("id, program")
+        .is_("storage_path", "null")
+        .execute()
+    )
+    return result.data or []
+
+def clear_timetable_cache():
+    """Drop cached reads after a write so the change shows on the next rerun."""
+    _fetch_latest_by_program.clear()
+    _fetch_history_page.clear()
+    _fetch_legacy_rows.clear()
+
+def _load_timetable_body(row_id: int, storage_path: str | None) -> bytes:
+    if storage_path:
+        return get_client().storage.from_(TIMETABLE_BUCKET).download(storage_path)
+    # Rows uploaded before the move to Storage keep the PDF as base64 `file_data`
+    result = (
+        get_client()
+        .table("timetable_store")
+        .select("file_data")
+        .eq("id", row_id)
+        .single()
+        .execute()
+    )
+    return pybase64.b64decode(result.data["file_data"])   # accepts the str as-is, no .encode() copy
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_timetable_body(row_id: int, storage_path: str | None) -> bytes:
+    return _load_timetable_body(row_id, storage_path)
+
+def get_latest_by_program() -> dict:
+    """Return {program: latest timetable metadata row} for every program with an upload."""
     try:
-        result = (
-            get_client()
-            .table("timetable_store")
-            .select("*")
-            .eq("program", program)
-            .order("uploaded_at", desc=True)
-            .limit(1)
-            .execute()
-        )
-        return result.data[0] if result.data else None
+        return _fetch_latest_by_program()
     except Exception as e:
         st.error(f"Database error: {e}")
+        return {}
+
+def get_timetable_meta(program: str):
+    """Return the latest timetable's metadata (no PDF) for a given program."""
+    return get_latest_by_program().get(program)
+
+def get_timetable_body(row: dict) -> bytes | None:
+    """Return a timetable row's PDF bytes, cached per row for five minutes."""
+    try:
+        return _fetch_timetable_body(row["id"], row.get("storage_path"))
+    except Exception:
         return None
 
-def get_all_timetables(program: str):
-    """Return all rows for a program (id + meta, no file_data) ordered newest first."""
+def get_history_page(program: str, page: int) -> list:
+    """Return up to HISTORY_PAGE_SIZE + 1 rows (id + meta, no file_data) newest first;
+    the extra row, if present, means there is another page."""
     try:
-        result = (
+        return _fetch_history_page(program, page)
+    except Exception:
+        return []
+
+def get_legacy_rows() -> list:
+    """Return id + program of rows whose PDF is still base64 in `file_data`."""
+    try:
+        return _fetch_legacy_rows()
+    except Exception:
+        return []
+
+def _content_hash(pdf_file) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: pdf_file.read(1 << 20), b""):
+        digest.update(chunk)
+    pdf_file.seek(0)
+    return digest.hexdigest()
+
+def save_timetable(filename, pdf_file, label, program, uploaded_by="Admin"):
+    """Stream the PDF file object to Storage, then insert a row pointing at it.
+    Re-uploading a PDF the program already has just relabels that row and makes it current."""
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        content_hash = _content_hash(pdf_file)
+        existing = (
             get_client()
             .table("timetable_store")
-            .select("id, filename, label, uploaded_by, uploaded_at, program")
+            .select("id")
             .eq("program", program)
-            .order("uploaded_at", desc=True)
+            .eq("content_hash", content_hash)
+            .limit(1)
             .execute()
-        )
-        return result.data or []
-    except Exception:
-        return []
+        ).data
+        if existing:
+            get_client().table("timetable_store").update({
+                "filename":    filename,
+                "label":       label,
+                "uploaded_by": uploaded_by,
+                "uploaded_at": now,
+            }).eq("id", existing[0]["id"]).execute()
+            clear_timetable_cache()
+            return True
+    except Exception as e:
+        st.error(f"Save failed: {e}")
+        return False
 
-def save_timetable(filename, file_b64, label, program, uploaded_by="Admin"):
+    storage_path = f"{program}/{uuid4().hex}.pdf"
+    bucket = get_client().storage.from_(TIMETABLE_BUCKET)
+    # storage3 only streams BufferedReader objects (anything else is treated as a path)
+    reader = BufferedReader(pdf_file)
+    try:
+        bucket.upload(storage_path, reader, {"content-type": "application/pdf"})
+    except Exception as e:
+        st.error(f"Upload failed: {e}")
+        return False
+    finally:
+        reader.detach()   # so garbage-collecting the reader doesn't close the UploadedFile
     try:
         get_client().table("timetable_store").insert({
-            "filename":    filename,
-            "file_data":   file_b64,
-            "label":       label,
-            "program":     program,
-            "uploaded_by": uploaded_by,
-            "uploaded_at": datetime.now(timezone.utc).isoformat(),
+            "filename":     filename,
+            "storage_path": storage_path,
+            "content_hash": content_hash,
+            "label":        label,
+            "program":      program,
+            "uploaded_by":  uploaded_by,
+            "uploaded_at":  now,
         }).execute()
+        clear_timetable_cache()
         return True
     except Exception as e:
+        try:
+            bucket.remove([storage_path])   # don't leave an orphaned object behind
+        except Exception:
+            pass
         st.error(f"Save failed: {e}")
         return False
 
-def delete_timetable(row_id: int):
+@st.cache_data(ttl=50 * 60, show_spinner=False)
+def _signed_download_url(storage_path: str, filename: str) -> str:
+    # Signed for an hour, cached for 50 min so a cached URL never hands out an expired link
+    signed = get_client().storage.from_(TIMETABLE_BUCKET).create_signed_url(
+        storage_path, 60 * 60, {"download": filename}
+    )
+    return signed.get("signedURL") or signed["signedUrl"]
+
+def pdf_download_url(row: dict) -> str | None:
+    """Signed Storage URL so the browser downloads the PDF straight from Supabase."""
+    if not row.get("storage_path"):
+        return None
+    try:
+        return _signed_download_url(row["storage_path"], row.get("filename", "timetable.pdf"))
+    except Exception:
+        return None
+
+def delete_timetable(row_id: int, storage_path: str | None = None):
     try:
         get_client().table("timetable_store").delete().eq("id", row_id).execute()
-        return True
     except Exception as e:
         st.error(f"Delete failed: {e}")
         return False
+    clear_timetable_cache()
+    if storage_path:
+        try:
+            get_client().storage.from_(TIMETABLE_BUCKET).remove([storage_path])
+        except Exception:
+            pass   # the row is gone; an orphaned object is harmless
+    return True
+
+def move_to_storage(row: dict) -> bool:
+    """Copy a legacy base64 row's PDF into Storage and clear its `file_data`."""
+    # Uncached: a bulk move holds one decoded PDF at a time instead of pinning each in the cache
+    try:
+        pdf_bytes = _load_timetable_body(row["id"], None)
+    except Exception:
+        return False
+    storage_path = f"{row['program']}/{uuid4().hex}.pdf"
+    bucket = get_client().storage.from_(TIMETABLE_BUCKET)
+    try:
+        bucket.upload(storage_path, pdf_bytes, {"content-type": "application/pdf"})
+    except Exception as e:
+        st.error(f"Upload failed: {e}")
+        return False
+    try:
+        (
+            get_client()
+            .table("timetable_store")
+            .update({
+                "storage_path": storage_path,
+                "file_data":    None,
+                # Same digest as _content_hash so re-uploads of this PDF are recognised
+                "content_hash": hashlib.blake2b(pdf_bytes, digest_size=16).hexdigest(),
+            })
+            .eq("id", row["id"])
+            .execute()
+        )
+        return True
+    except Exception as e:
+        try:
+            bucket.remove([storage_path])
+        except Exception:
+            pass
+        st.error(f"Move failed: {e}")
+        return False
+
+@st.cache_resource
+def _admin_password_digest() -> bytes:
+    """Memoised per server process — rotating the secret needs an app restart.
+    Raises ValueError (not cached) if ADMIN_PASSWORD_SHA256 isn't valid hex."""
+    # ADMIN_PASSWORD_SHA256 (hex) is preferred; the older plaintext ADMIN_PASSWORD still works
+    if "ADMIN_PASSWORD_SHA256" in st.secrets:
+        return bytes.fromhex(st.secrets["ADMIN_PASSWORD_SHA256"])
+    return hashlib.sha256(st.secrets.get("ADMIN_PASSWORD", "CLC2026admin").encode()).digest()
 
 def verify_admin(password: str) -> bool:
-    return password == st.secrets.get("ADMIN_PASSWORD", "CLC2026admin")
+    """Constant-time check of the password's SHA-256 against the configured secret."""
+    try:
+        expected = _admin_password_digest()
+    except ValueError:
+        st.error("ADMIN_PASSWORD_SHA256 is not valid hex — admin login is disabled.")
+        return False
+    return hmac.compare_digest(expected, hashlib.sha256(password.encode()).digest())
 
+@lru_cache(maxsize=512)   # upload timestamps never change, so repeat rows are free
 def fmt_date(iso: str) -> str:
     try:
         dt = datetime.fromisoformat(iso.replace("Z", "+00:00"))
@@ -124,152 +341,51 @@ def fmt_date(iso: str) -> str:
 
 # ── PDF rendering via PyMuPDF (no poppler required) ───────────────────────────
 def pdf_to_images(pdf_bytes: bytes) -> list | None:
-    """Convert PDF bytes → list of base64 PNG strings via PyMuPDF."""
+    """Convert PDF bytes → list of encoded page images (None for blank pages),
+    cached by content hash so reruns do no rendering or encoding."""
+    if render_pages is None:
+        return None
     try:
-        import fitz  # PyMuPDF
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        images = []
-        for page in doc:
-            mat = fitz.Matrix(2.0, 2.0)   # 2× scale ≈ 150 dpi equivalent
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            images.append(base64.b64encode(pix.tobytes("png")).decode())
-        doc.close()
-        return images
+        return _render_pdf_pages(hashlib.blake2b(pdf_bytes, digest_size=8).hexdigest(), pdf_bytes)
     except Exception:
         return None
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _render_pdf_pages(pdf_hash: str, _pdf_bytes: bytes) -> list:
+    """Rasterise every page via pdf_render. `_pdf_bytes` is not hashed by Streamlit;
+    the cache is keyed on `pdf_hash` so multi-MB PDFs aren't re-hashed per rerun.
+    Failures raise out of here so they are never cached."""
+    return render_pages(_pdf_bytes)
+
+def show_pdf_pages(pdf_bytes: bytes) -> bool:
+    """Show every non-blank page in one st.image element; False if nothing could be rendered."""
+    images = pdf_to_images(pdf_bytes)
+    if not (images and any(images)):
+        return False
+    # st.image serves the bytes from Streamlit's media endpoint under a content-hash
+    # URL, so the browser caches them and reruns don't resend base64 over the websocket
+    pages = [(i, img) for i, img in enumerate(images) if img is not None]
+    captions = [f"Page {i+1}" for i, _ in pages] if len(images) > 1 else None
+    st.image([img for _, img in pages], caption=captions, use_container_width=True)
+    return True
+
 # ── CSS ───────────────────────────────────────────────────────────────────────
+# Styles live in static/app.css so the browser caches them instead of the whole
+# stylesheet being re-sent on every rerun; fonts load via <link>, not @import.
 st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=DM+Sans:wght@300;400;500;600;700&family=DM+Serif+Display&display=swap');
-*,*::before,*::after{box-sizing:border-box}
-:root{
-  --navy:#1a2e44;--navy-mid:#2d4f72;--navy-light:#e8edf3;--navy-border:#c5d3e0;
-  --green:#059669;--green-light:#d1fae5;
-  --red:#dc2626;--red-light:#fee2e2;
-  --white:#ffffff;--bg:#f4f6f9;--ink:#1a2332;--ink-light:#6b7f94;--radius:12px
-}
-html,body,[class*="css"]{font-family:'DM Sans',sans-serif!important;background:var(--bg)!important}
-.block-container{padding:0!important;max-width:100%!important}
-header{display:none!important}
-
-/* ── Header ── */
-.app-header{
-  background:linear-gradient(135deg,var(--navy) 0%,var(--navy-mid) 100%);
-  padding:22px 32px;
-  display:flex;align-items:center;justify-content:space-between;flex-wrap:wrap;gap:10px;
-}
-.app-header-left{display:flex;align-items:center;gap:14px}
-.app-header-icon{
-  width:44px;height:44px;min-width:44px;
-  background:rgba(255,255,255,0.12);border-radius:10px;
-  display:flex;align-items:center;justify-content:center;font-size:22px;
-}
-.app-header-title{
-  font-family:'DM Serif Display',serif;font-size:22px;
-  color:white;line-height:1.1;
-}
-.app-header-sub{font-size:12px;color:rgba(255,255,255,0.55);margin-top:2px}
-.header-badges{display:flex;gap:8px;flex-wrap:wrap;align-items:center}
-.badge-white{
-  background:rgba(255,255,255,0.12);
-  border:1px solid rgba(255,255,255,0.2);
-  border-radius:20px;padding:4px 12px;
-  font-size:11px;font-weight:600;color:rgba(255,255,255,0.85);
-  white-space:nowrap;
-}
-.badge-term{
-  background:rgba(200,168,75,0.25);
-  border:1px solid rgba(200,168,75,0.4);
-  border-radius:20px;padding:4px 12px;
-  font-size:11px;font-weight:700;color:#f0d080;
-  white-space:nowrap;
-}
-
-/* ── Layout ── */
-.main-wrap{max-width:980px;margin:0 auto;padding:28px 16px 60px}
-
-/* ── Cards ── */
-.card-wrap{
-  background:var(--white);border:1px solid var(--navy-border);
-  border-radius:14px;overflow:hidden;margin-bottom:18px;
-}
-.card-header{
-  background:linear-gradient(90deg,var(--navy-light),#f0f4f8);
-  padding:14px 20px;
-  display:flex;align-items:center;justify-content:space-between;flex-wrap:wrap;gap:8px;
-  border-bottom:1px solid var(--navy-border);
-}
-.card-title{font-size:14px;font-weight:700;color:var(--navy)}
-.card-meta{font-size:11px;color:var(--ink-light);margin-top:2px}
-.badge-green{
-  background:var(--green-light);color:var(--green);
-  font-size:11px;font-weight:700;padding:3px 10px;border-radius:20px;
-  white-space:nowrap;
-}
-
-/* ── Timetable image ── */
-.timetable-img{width:100%;display:block}
-.page-divider{border:none;border-top:2px dashed var(--navy-border);margin:4px 0}
-
-/* ── Empty state ── */
-.no-tt{text-align:center;padding:48px 20px;color:var(--ink-light)}
-.no-tt-icon{font-size:44px;margin-bottom:10px}
-.no-tt h3{font-size:17px;font-weight:600;color:var(--navy);margin-bottom:6px}
-
-/* ── Section label ── */
-.section-label{
-  font-size:10px;font-weight:700;letter-spacing:0.1em;text-transform:uppercase;
-  color:var(--ink-light);margin:24px 0 10px;
-}
-
-/* ── History rows ── */
-.history-row{
-  background:var(--white);border:1px solid var(--navy-border);
-  border-radius:10px;padding:10px 14px;margin-bottom:7px;
-  display:flex;align-items:center;justify-content:space-between;flex-wrap:wrap;gap:6px;
-}
-.history-label{font-size:13px;font-weight:600;color:var(--ink)}
-.history-meta{font-size:11px;color:var(--ink-light);margin-top:1px}
-
-/* ── Admin panel ── */
-.admin-panel{
-  background:var(--white);border:1px solid var(--navy-border);
-  border-radius:14px;padding:20px 24px;margin-bottom:18px;
-}
-
-/* ── Buttons ── */
-.stButton>button{border-radius:8px!important;font-weight:600!important;font-family:'DM Sans',sans-serif!important}
-.stButton>button[kind="primary"]{background:var(--navy)!important;border-color:var(--navy)!important;color:white!important}
-.stDownloadButton>button{
-  background:var(--navy)!important;color:white!important;
-  border-radius:8px!important;font-weight:600!important;width:100%;
-}
-div[data-testid="stExpander"]{border:1px solid var(--navy-border)!important;border-radius:var(--radius)!important}
-
-/* ── Tabs ── */
-.stTabs [data-baseweb="tab-list"]{gap:4px;background:transparent}
-.stTabs [data-baseweb="tab"]{
-  background:#e8edf3;border-radius:8px 8px 0 0;
-  color:var(--navy);font-weight:600;padding:8px 18px;border:none;font-size:13px;
-}
-.stTabs [aria-selected="true"]{background:var(--navy-mid)!important;color:#fff!important}
-
-/* ── Mobile ── */
-@media(max-width:600px){
-  .app-header{padding:16px 16px}
-  .app-header-title{font-size:18px}
-  .main-wrap{padding:16px 10px 40px}
-  .admin-panel{padding:16px 14px}
-  .card-header{padding:12px 14px}
-  .stTabs [data-baseweb="tab"]{padding:6px 10px;font-size:12px}
-}
-</style>
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=DM+Sans:wght@300;400;500;600;700&family=DM+Serif+Display&display=swap">
+<link rel="stylesheet" href="app/static/app.css">
 """, unsafe_allow_html=True)
 
 # ── Session state ─────────────────────────────────────────────────────────────
 if "admin_authed" not in st.session_state:
     st.session_state.admin_authed = False
+if "active_program" not in st.session_state:
+    st.session_state.active_program = PROGRAMS[0]
+if "view_mode" not in st.session_state:
+    st.session_state.view_mode = "student"   # "student" | "admin"
 
 # ── Header ────────────────────────────────────────────────────────────────────
 term_label = get_term_week_label()
@@ -290,8 +406,6 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-st.markdown('<div class="main-wrap">', unsafe_allow_html=True)
-
 # ── Inline Admin Bar ──────────────────────────────────────────────────────────
 if not st.session_state.admin_authed:
     admin_col, login_col = st.columns([6, 1])
@@ -315,6 +429,7 @@ if not st.session_state.admin_authed:
             if st.button("Login", type="primary", use_container_width=True, key="admin_login_btn"):
                 if verify_admin(admin_pw):
                     st.session_state.admin_authed = True
+                    st.session_state.view_mode = "admin"
                     st.session_state.show_admin_login = False
                     st.rerun()
                 else:
@@ -357,64 +472,91 @@ else:
                 st.error("Please add a label.")
             else:
                 file.seek(0)
-                raw = file.read()
-                b64data = base64.b64encode(raw).decode("utf-8")
-                if save_timetable(file.name, b64data, lbl.strip(), prog_choice):
+                if save_timetable(file.name, file, lbl.strip(), prog_choice):
                     st.success(f"✅ {PROGRAM_LABELS[prog_choice]} timetable updated — {lbl.strip()}")
-                    st.cache_resource.clear()
                     st.rerun()
         if logout:
             st.session_state.admin_authed = False
+            st.session_state.view_mode = "student"
             st.rerun()
 
     # ── Version history with delete ──
-    with st.expander("🗂️ Version History & Delete Old Versions"):
-        for program in PROGRAMS:
-            all_tt = get_all_timetables(program)
-            if not all_tt:
-                continue
-            prog_label_str = PROGRAM_LABELS[program]
-            st.markdown(f"**{prog_label_str}**")
-            for i, tt in enumerate(all_tt):
-                row_id   = tt.get("id")
-                tt_label = tt.get("label") or tt.get("filename", "")
-                tt_meta  = f"Uploaded {fmt_date(tt.get('uploaded_at', ''))} · {tt.get('filename', '')}"
-                is_current = (i == 0)
-                col_info, col_del = st.columns([5, 1])
-                with col_info:
-                    badge = " ✅ Current" if is_current else ""
-                    st.markdown(f'<div style="font-size:0.82rem;font-weight:600;color:#1a2e44;">📄 {tt_label}{badge}</div>'
-                                f'<div style="font-size:0.72rem;color:#6b7f94;">{tt_meta}</div>',
+    # A toggle rather than an expander: expander bodies run (and query) even when collapsed
+    if st.toggle("🗂️ Version History & Delete Old Versions", key="show_history"):
+        legacy = get_legacy_rows()
+        if legacy and st.button(f"📦 Move {len(legacy)} older upload(s) to Storage", key="move_legacy"):
+            moved = sum(move_to_storage(tt) for tt in legacy)
+            clear_timetable_cache()
+            st.success(f"Moved {moved} of {len(legacy)}.")
+            st.rerun()
+
+        # Open on the program the admin is looking at (kept in step by the selector's on_change)
+        st.session_state.setdefault("history_program", st.session_state.active_program)
+        hist_prog = st.selectbox("History for", options=PROGRAMS, key="history_program",
+                                 format_func=lambda p: PROGRAM_LABELS[p])
+        page_key  = f"history_page_{hist_prog}"
+        page      = st.session_state.get(page_key, 0)
+        all_tt    = get_history_page(hist_prog, page)
+        if not all_tt and page > 0:
+            # e.g. the last row on this page was deleted — step back to a page with rows
+            st.session_state[page_key] = page - 1
+            st.rerun()
+        has_next  = len(all_tt) > HISTORY_PAGE_SIZE
+        if not all_tt:
+            st.caption("No uploads yet.")
+        for i, tt in enumerate(all_tt[:HISTORY_PAGE_SIZE]):
+            row_id   = tt.get("id")
+            tt_label = tt.get("label") or tt.get("filename", "")
+            tt_meta  = f"Uploaded {fmt_date(tt.get('uploaded_at') or '')} · {tt.get('filename', '')}"
+            is_current = (page == 0 and i == 0)
+            col_info, col_prev, col_del = st.columns([5, 1, 1])
+            with col_info:
+                badge = " ✅ Current" if is_current else ""
+                st.markdown(f'<div style="font-size:0.82rem;font-weight:600;color:#1a2e44;">📄 {tt_label}{badge}</div>'
+                            f'<div style="font-size:0.72rem;color:#6b7f94;">{tt_meta}</div>',
+                            unsafe_allow_html=True)
+            with col_prev:
+                preview = st.toggle("👁", key=f"preview_{row_id}", help="Preview this version")
+            with col_del:
+                if not is_current:
+                    if st.button("🗑", key=f"del_{row_id}", help="Delete this version"):
+                        if delete_timetable(row_id, tt.get("storage_path")):
+                            st.success("Deleted.")
+                            st.rerun()
+                else:
+                    st.markdown("<div style='font-size:11px;color:#9aa5b4;text-align:center;padding-top:8px;'>active</div>",
                                 unsafe_allow_html=True)
-                with col_del:
-                    if not is_current:
-                        if st.button("🗑", key=f"del_{row_id}", help="Delete this version"):
-                            if delete_timetable(row_id):
-                                st.success("Deleted.")
-                                st.rerun()
-                    else:
-                        st.markdown("<div style='font-size:11px;color:#9aa5b4;text-align:center;padding-top:8px;'>active</div>",
-                                    unsafe_allow_html=True)
+            if preview:
+                # The PDF body is only fetched for versions the admin asks to see
+                pdf_bytes = get_timetable_body(tt)
+                if pdf_bytes is None or not show_pdf_pages(pdf_bytes):
+                    st.warning("Could not render this version.")
+
+        if page > 0 or has_next:
+            nav_prev, nav_info, nav_next = st.columns([1, 5, 1])
+            with nav_prev:
+                if page > 0 and st.button("◀ Newer", key="history_prev", use_container_width=True):
+                    st.session_state[page_key] = page - 1
+                    st.rerun()
+            with nav_info:
+                st.caption(f"Page {page + 1}")
+            with nav_next:
+                if has_next and st.button("Older ▶", key="history_next", use_container_width=True):
+                    st.session_state[page_key] = page + 1
+                    st.rerun()
 
 st.markdown("---")
 
 # ── Helper: render one program's timetable ────────────────────────────────────
 def render_timetable_view(program: str):
-    current = get_timetable(program)
+    current = get_timetable_meta(program)
 
     if current:
         label    = current.get("label") or current.get("filename", "Current Timetable")
         filename = current.get("filename", "timetable.pdf")
-        uploaded = fmt_date(current.get("uploaded_at", ""))
+        uploaded = fmt_date(current.get("uploaded_at") or "")
         uploader = current.get("uploaded_by", "Admin")
 
-        try:
-            pdf_bytes = base64.b64decode(current["file_data"])
-            has_pdf   = True
-        except Exception:
-            has_pdf   = False
-            pdf_bytes = None
-
         st.markdown(f"""
         <div class="card-wrap">
           <div class="card-header">
@@ -426,32 +568,35 @@ def render_timetable_view(program: str):
           </div>
         </div>""", unsafe_allow_html=True)
 
-        if has_pdf:
-            with st.spinner("Loading timetable…"):
-                images = pdf_to_images(pdf_bytes)
-
-            if images:
-                st.markdown('<div class="card-wrap">', unsafe_allow_html=True)
-                for i, img_b64 in enumerate(images):
-                    if i > 0:
-                        st.markdown('<hr class="page-divider">', unsafe_allow_html=True)
-                    st.markdown(
-                        f'<img src="data:image/png;base64,{img_b64}" '
-                        f'class="timetable-img" alt="Page {i+1}">',
-                        unsafe_allow_html=True,
-                    )
-                st.markdown('</div>', unsafe_allow_html=True)
-            else:
+        # The header only needs metadata; the PDF body is fetched once it's shown
+        if st.session_state.view_mode == "admin":
+            # Admins load PDFs per version from the 👁 toggles in Version History
+            st.caption("Admin view — turn on Version History above (it opens on this program) and switch on 👁 to preview a PDF.")
+            return
+
+        with st.spinner("Loading timetable…"):
+            pdf_bytes = get_timetable_body(current)
+            rendered  = pdf_bytes is not None and show_pdf_pages(pdf_bytes)
+
+        if pdf_bytes is not None:
+            if not rendered:
                 st.warning("⚠️ Could not render PDF as image. Please download below.")
 
-            st.download_button(
-                label=f"⬇  Download {filename}",
-                data=pdf_bytes,
-                file_name=filename,
-                mime="application/pdf",
-                use_container_width=True,
-                key=f"dl_{program}",
-            )
+            # Prefer a signed Storage link so the PDF isn't pushed through the
+            # Streamlit server; legacy base64 rows fall back to the bytes we hold.
+            download_url = pdf_download_url(current)
+            if download_url:
+                st.link_button(f"⬇  Download {filename}", download_url,
+                               use_container_width=True)
+            else:
+                st.download_button(
+                    label=f"⬇  Download {filename}",
+                    data=pdf_bytes,
+                    file_name=filename,
+                    mime="application/pdf",
+                    use_container_width=True,
+                    key=f"dl_{program}",
+                )
         else:
             st.warning("Could not load timetable data — please ask admin to re-upload.")
 
@@ -464,13 +609,15 @@ def render_timetable_view(program: str):
         </div></div>""", unsafe_allow_html=True)
 
 
-# ── Program tabs ──────────────────────────────────────────────────────────────
-tab_labels = [PROGRAM_LABELS[p] for p in PROGRAMS]
-tabs = st.tabs(tab_labels)
-
-for tab, program in zip(tabs, PROGRAMS):
-    with tab:
-        render_timetable_view(program)
+# ── Program selector ──────────────────────────────────────────────────────────
+# st.tabs runs every tab body on each rerun; a radio lets us fetch and render
+# only the program the user is actually looking at.
+def _follow_active_program():
+    # Admins preview PDFs from Version History, so point it at the program just picked
+    st.session_state.history_program = st.session_state.active_program
 
+st.radio("Program", options=PROGRAMS, format_func=lambda p: PROGRAM_LABELS[p],
+         horizontal=True, label_visibility="collapsed", key="active_program",
+         on_change=_follow_active_program)
 
-st.markdown('</div>', unsafe_allow_html=True)
+render_timetable_view(st.session_state.active_program)
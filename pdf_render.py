@@ -0,0 +1,41 @@
+"""
+PDF page rendering (PyMuPDF)
+============================
+Pages are rendered one after another: PyMuPDF holds the GIL and must not be
+shared across threads, and forking worker processes from the multi-threaded
+Streamlit server risks deadlocks, so there is no safe parallel path here.
+Results are cached by content hash in app.py, so this only runs on a miss.
+"""
+
+import fitz  # PyMuPDF
+
+IMAGE_FORMAT = "JPEG"   # set to "PNG" for lossless pages at ~5-10× the payload
+JPEG_QUALITY = 82
+RENDER_TARGET_PX = 1100   # matches the page image max-width in static/app.css; A4 ≈ 133 dpi
+MAX_SCALE = 2.0
+
+
+def _is_blank(page) -> bool:
+    # Cheapest probes first; get_drawings only runs for pages with no text or images
+    return not (page.get_text("text").strip() or page.get_images() or page.get_drawings())
+
+
+def _page_to_image(page) -> bytes | None:
+    if _is_blank(page):
+        return None
+    scale = min(MAX_SCALE, RENDER_TARGET_PX / page.rect.width)   # A4 ≈ 1.85×
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False, colorspace=fitz.csRGB)
+    # MuPDF encodes straight from the pixmap — no samples copy, PIL image or BytesIO
+    if IMAGE_FORMAT == "PNG":
+        return pix.tobytes("png")
+    return pix.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+
+
+def render_pages(pdf_bytes: bytes) -> list[bytes | None]:
+    """Convert PDF bytes → list of encoded page images.
+    Blank pages are not rasterised and come back as None."""
+    try:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return [_page_to_image(page) for page in doc]
+    finally:
+        fitz.TOOLS.store_shrink(100)   # empty MuPDF's resource store after each render
@@ -0,0 +1,14 @@
+-- PDFs move out of the base64 `file_data` column into the `timetables`
+-- Storage bucket; rows keep only the object path. Existing rows keep
+-- `file_data` and are still read by the app until they are re-uploaded.
+--
+-- The bucket gets no storage.objects policies: the app reads and writes it
+-- with the service_role key (SUPABASE_KEY), which bypasses RLS, and anon
+-- clients have no access to the PDFs.
+
+alter table timetable_store add column if not exists storage_path text;
+alter table timetable_store alter column file_data drop not null;
+
+insert into storage.buckets (id, name, public)
+values ('timetables', 'timetables', false)
+on conflict (id) do nothing;
@@ -0,0 +1,12 @@
+-- Index the "latest per program" lookup and expose it as a metadata-only
+-- view; legacy base64 `file_data` is fetched by id from timetable_store.
+
+create index if not exists idx_tt_program_uploaded
+    on timetable_store (program, uploaded_at desc);
+
+create or replace view current_timetables
+with (security_invoker = true) as
+  select distinct on (program)
+         id, filename, label, uploaded_by, uploaded_at, program, storage_path
+  from timetable_store
+  order by program, uploaded_at desc;
@@ -0,0 +1,7 @@
+-- blake2b-128 hex digest of the uploaded PDF, used to spot re-uploads of
+-- the same file for a program. Older rows stay NULL and are never matched.
+
+alter table timetable_store add column if not exists content_hash text;
+
+create index if not exists idx_tt_program_content_hash
+    on timetable_store (program, content_hash);